@@ -14,11 +14,22 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import json
 import time
+import functools
 import threading
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict, field
+import numpy as np
 import alpaca_trade_api as tradeapi
 import openai
 
+# orjson is considerably faster than the stdlib encoder; fall back if missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Try to import from config.py, fallback to environment variables
 try:
     from config import (
@@ -40,50 +51,197 @@ except ImportError:
         print("⚠️ WARNING: API keys not found!")
         print("Please create config.py or set environment variables.")
 
+# Interval between trading passes (seconds)
+AUTO_UPDATE_INTERVAL = 5
+
+# Alpaca allows 200 requests per minute per account; every API call shares it
+API_RATE_LIMIT = 200
+API_RATE_PERIOD = 60
+
+# How long per-symbol max entry price lookups are reused (seconds). These
+# only cover fills older than the shared per-pass batch, which rarely change,
+# so the entry is reused across many AUTO_UPDATE_INTERVAL passes.
+MAX_ENTRY_CACHE_TTL = 60
+
+# Minimum interval between equity data writes (coalesces rapid mutations)
+SAVE_INTERVAL = 2
+
+# How long portfolio/order snapshots are reused by the AI chat (seconds)
+PORTFOLIO_CACHE_TTL = 10
+_PORT_CACHE = {"t": 0, "portfolio": None, "orders": None}
+
+# Caps on how many holdings/orders are embedded in the AI prompt
+PROMPT_MAX_HOLDINGS = 50
+PROMPT_MAX_ORDERS = 50
+
+# Position/order dicts are reused across fetches, keyed by symbol/order id.
+# Entries that stop appearing are dropped every POOL_SCRUB_INTERVAL seconds.
+POOL_SCRUB_INTERVAL = 60
+_PORT_POOL = {}
+_ORDER_POOL = {}
+_POOL_SCRUBBED = {"portfolio": 0, "orders": 0}
+
+# Placed levels are tracked as bits 1..n of a mask that is persisted as a
+# 64-bit integer, which caps the number of levels
+MAX_LEVELS = 63
+
+# Input validation for the equity form
+_INT_RE = re.compile(r'[0-9]+')
+_FLOAT_RE = re.compile(r'[0-9]+(?:\.[0-9]*)?|\.[0-9]+')
+
 # Initialize Alpaca API
 api = tradeapi.REST(ALPACA_API_KEY, ALPACA_SECRET_KEY, ALPACA_BASE_URL, api_version="v2")
 
+# Initialize OpenAI client (keeps its HTTP connection pool between requests)
+openai_client = openai.OpenAI(api_key=OPENAI_API_KEY)
+
+
+def dump_json(data, pretty=False):
+    """
+    Serialize data to JSON bytes, using orjson when available.
+    
+    Args:
+        data: JSON-compatible object (numpy arrays are written as lists)
+        pretty (bool): Indent the output for human inspection instead of
+            writing it compactly
+        
+    Returns:
+        bytes: UTF-8 encoded JSON document
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    if pretty:
+        return json.dumps(data, indent=2, default=_json_default).encode('utf-8')
+    return json.dumps(data, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+
+def _json_default(obj):
+    """
+    Fallback encoder for types the stdlib json module can't handle.
+    """
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, Equity):
+        return asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def load_json(raw):
+    """
+    Parse JSON bytes, using orjson when available.
+    
+    Args:
+        raw (bytes): UTF-8 encoded JSON document
+        
+    Returns:
+        Parsed JSON object
+    """
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _scrub_pool(pool, name, seen):
+    """
+    Drop pooled entries that were not part of the latest fetch, at most
+    once every POOL_SCRUB_INTERVAL seconds.
+    
+    Args:
+        pool (dict): Pool to scrub
+        name (str): Key of the pool in _POOL_SCRUBBED
+        seen (set): Keys returned by the latest fetch
+    """
+    now = time.time()
+    if now - _POOL_SCRUBBED[name] >= POOL_SCRUB_INTERVAL:
+        for key in pool.keys() - seen:
+            del pool[key]
+        _POOL_SCRUBBED[name] = now
+
 
 def fetch_portfolio():
     """
     Fetch current portfolio positions from Alpaca.
+    The returned dicts are pooled and updated in place on the next call.
     
     Returns:
         list: List of dictionaries containing position data for each holding
     """
-    positions = api.list_positions()
+    positions = call_api(api.list_positions)
     portfolio = []
     for pos in positions:
-        portfolio.append({
-            'symbol': pos.symbol,
-            'qty': pos.qty,
-            'entry_price': pos.avg_entry_price,
-            'current_price': pos.current_price,
-            'unrealized_pl': pos.unrealized_pl,
-            'side': 'buy'
-        })
+        d = _PORT_POOL.get(pos.symbol)
+        if d is None:
+            d = _PORT_POOL[pos.symbol] = {'symbol': pos.symbol}
+        d['qty'] = pos.qty
+        d['entry_price'] = pos.avg_entry_price
+        d['current_price'] = pos.current_price
+        d['unrealized_pl'] = pos.unrealized_pl
+        portfolio.append(d)
+    _scrub_pool(_PORT_POOL, "portfolio", {d['symbol'] for d in portfolio})
     return portfolio
 
 
 def fetch_open_orders():
     """
     Fetch all open orders from Alpaca.
+    The returned dicts are pooled and updated in place on the next call.
     
     Returns:
         list: List of dictionaries containing open order details
     """
-    orders = api.list_orders(status='open')
+    orders = call_api(api.list_orders, status='open')
     open_orders = []
     for order in orders:
-        open_orders.append({
-            'symbol': order.symbol,
-            'qty': order.qty,
-            'limit_price': order.limit_price,
-            'side': 'buy'
-        })
+        d = _ORDER_POOL.get(order.id)
+        if d is None:
+            d = _ORDER_POOL[order.id] = {'symbol': order.symbol}
+        d['qty'] = order.qty
+        d['limit_price'] = order.limit_price
+        open_orders.append(d)
+    _scrub_pool(_ORDER_POOL, "orders", {order.id for order in orders})
     return open_orders
 
 
+def get_portfolio_snapshot():
+    """
+    Fetch portfolio positions and open orders, reusing the previous result
+    if it is younger than PORTFOLIO_CACHE_TTL seconds.
+    
+    Returns:
+        tuple: (portfolio, open_orders) lists as returned by fetch_portfolio
+            and fetch_open_orders
+    """
+    now = time.time()
+    if now - _PORT_CACHE["t"] >= PORTFOLIO_CACHE_TTL:
+        _PORT_CACHE["portfolio"] = fetch_portfolio()
+        _PORT_CACHE["orders"] = fetch_open_orders()
+        _PORT_CACHE["t"] = now
+    return _PORT_CACHE["portfolio"], _PORT_CACHE["orders"]
+
+
+@functools.lru_cache(maxsize=32)
+def chat_completion(prompt):
+    """
+    Send a prompt to OpenAI. Results are memoized on the full prompt text, which
+    embeds the portfolio, open orders and question, so repeating a question
+    against an unchanged portfolio doesn't hit the API again.
+    
+    Args:
+        prompt (str): System prompt to send
+        
+    Returns:
+        str: Model response text
+    """
+    response = openai_client.chat.completions.create(
+        model="gpt-3.5-turbo",
+        messages=[{"role": "system", "content": prompt}]
+    )
+    return response.choices[0].message.content
+
+
 def llm_response(message):
     """
     Generate AI-powered portfolio analysis using OpenAI.
@@ -94,8 +252,17 @@ def llm_response(message):
     Returns:
         str: AI-generated response with portfolio insights
     """
-    portfolio_data = fetch_portfolio()
-    open_orders = fetch_open_orders()
+    portfolio_data, open_orders = get_portfolio_snapshot()
+    
+    # Embed compact JSON rather than Python reprs to keep the prompt short,
+    # keeping the holdings with the largest absolute P/L if there are many
+    top_holdings = sorted(
+        portfolio_data,
+        key=lambda p: abs(float(p['unrealized_pl'] or 0)),
+        reverse=True
+    )[:PROMPT_MAX_HOLDINGS]
+    portfolio_blob = dump_json(top_holdings).decode('utf-8')
+    orders_blob = dump_json(open_orders[:PROMPT_MAX_ORDERS]).decode('utf-8')
     
     pre_prompt = f"""
     You are an AI portfolio manager responsible for analyzing my portfolio.
@@ -106,24 +273,176 @@ def llm_response(message):
     4.) Speculate on the market outlook based on current market conditions
     5.) Identify potential market risks and suggest risk management strategies
 
-    Here is my portfolio: {portfolio_data}
+    Here is my portfolio: {portfolio_blob}
 
-    Here are my open orders: {open_orders}
+    Here are my open orders: {orders_blob}
 
     Overall, answer the following question with priority having that background: {message}
     """
     
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "system", "content": pre_prompt}],
-            api_key=OPENAI_API_KEY
-        )
-        return response['choices'][0]['message']['content']
+        return chat_completion(pre_prompt)
     except Exception as e:
         return f"Error communicating with AI: {str(e)}"
 
 
+@functools.lru_cache(maxsize=32)
+def _level_steps(levels):
+    """
+    Level multipliers 1..levels, shared by every symbol with the same number
+    of levels. The array is read-only since it is cached.
+    
+    Args:
+        levels (int): Number of levels
+        
+    Returns:
+        np.ndarray: float64 array [1, 2, ..., levels]
+    """
+    steps = np.arange(1, levels + 1, dtype=np.float64)
+    steps.flags.writeable = False
+    return steps
+
+
+def compute_level_prices(entry_price, drawdown, levels):
+    """
+    Calculate Martingale-style DCA price levels in a single vectorized pass.
+    
+    Args:
+        entry_price (float): Price the levels are measured from
+        drawdown (float): Fractional drop between consecutive levels
+        levels (int): Number of levels
+        
+    Returns:
+        np.ndarray: Level prices rounded to cents, level 1 first
+    """
+    return np.round(entry_price * (1 - drawdown * _level_steps(levels)), 2)
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket. Callers block in acquire() until a token is
+    available, which keeps concurrent API calls under the account rate limit.
+    """
+    
+    def __init__(self, rate, period):
+        """
+        Initialize a full bucket.
+        
+        Args:
+            rate (int): Number of calls allowed per period (also the burst size)
+            period (float): Length of the period in seconds
+        """
+        self.capacity = rate
+        self.tokens = rate
+        self.fill_rate = rate / period
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """
+        Take one token, sleeping until one is available.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.fill_rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.fill_rate
+            time.sleep(wait)
+
+
+@dataclass(slots=True)
+class Equity:
+    """
+    A tracked equity and the state of its DCA levels.
+    
+    Attributes:
+        symbol: Stock ticker symbol
+        position: 1 once the initial entry has filled, else 0
+        entry_price: Price the levels are measured from
+        drawdown: Fractional drop between consecutive levels
+        status: 'On' while the trading system is active, else 'Off'
+        levels: Level prices, level 1 first (excluded from ==, since
+            comparing arrays doesn't yield a single bool)
+        placed_bits: Bit n is set once the order for level n is placed
+    """
+    symbol: str
+    position: int
+    entry_price: float
+    drawdown: float
+    status: str
+    levels: np.ndarray = field(compare=False)
+    placed_bits: int = 0
+
+
+def migrate_levels(data):
+    """
+    Convert an equity's levels to the current layout in place: a float
+    array of level prices plus a placed_bits mask where bit n set means
+    the order for level n has been placed.
+    
+    Older data files stored levels as a {level: price} dict, using a
+    negative key for levels whose order had been placed.
+    
+    Args:
+        data (dict): Equity data as loaded from the data file
+    """
+    levels = data['levels']
+    if isinstance(levels, dict):
+        keyed = {int(key): price for key, price in levels.items()}
+        prices = [0.0] * max((abs(key) for key in keyed), default=0)
+        placed_bits = 0
+        for key, price in keyed.items():
+            prices[abs(key) - 1] = price
+            if key < 0:
+                placed_bits |= 1 << -key
+        data['levels'] = np.array(prices, dtype=np.float64)
+        data['placed_bits'] = placed_bits
+    else:
+        data['levels'] = np.asarray(levels, dtype=np.float64)
+        data.setdefault('placed_bits', 0)
+
+
+def format_levels(levels, placed_bits):
+    """
+    Render level prices for display, marking placed levels with '*'.
+    
+    Args:
+        levels (np.ndarray): Level prices, level 1 first
+        placed_bits (int): Placed level mask
+        
+    Returns:
+        str: Comma separated level prices
+    """
+    return ', '.join(
+        f"{price}*" if placed_bits & (1 << level) else str(price)
+        for level, price in enumerate(levels.tolist(), start=1)
+    )
+
+
+api_limiter = RateLimiter(API_RATE_LIMIT, API_RATE_PERIOD)
+
+
+def call_api(method, *args, **kwargs):
+    """
+    Call an Alpaca API method once the shared rate limiter allows it.
+    
+    Args:
+        method: Bound method of the api client
+        *args, **kwargs: Arguments for the method
+        
+    Returns:
+        Whatever the API method returns
+    """
+    api_limiter.acquire()
+    return method(*args, **kwargs)
+
+
 def fetch_mock_api(symbol):
     """
     Mock API function for testing purposes.
@@ -156,6 +475,34 @@ class TradingBotGUI:
         self.root.title("AI Trading Bot")
         self.equities = self.load_equities()
         self.system_running = False
+        # Bumped on every mutation; saves are skipped while it matches the
+        # version last written to disk
+        self._equities_version = 0
+        self._saved_version = 0
+        self._cached_blob = None
+        self._last_save = 0
+        self._save_failed = False
+        self._executor = ThreadPoolExecutor(max_workers=8)
+        # Account fetches get their own pools so they never queue behind
+        # rate-limited order submissions. _collect_api_state runs on the
+        # single state worker and blocks only on the fetch pool.
+        self._state_executor = ThreadPoolExecutor(max_workers=1)
+        self._fetch_executor = ThreadPoolExecutor(max_workers=4)
+        self._max_entry_cache = {}  # symbol -> (price, expiry)
+        # Symbols whose initial market order is in flight (None) or was
+        # accepted at the given monotonic time. Once a later account fetch
+        # has seen the order, the open-orders batch takes over.
+        self._pending_entries = {}
+        # Limit order futures not yet reported back -> (symbol, level)
+        self._inflight_orders = {}
+        # Treeview rows are keyed by symbol; values are cached so refreshes
+        # only touch rows that actually changed
+        self._row_values = {}
+        self._refreshed_version = -1
+        # Number of equities whose system is on; passes are skipped at zero
+        self._active_count = sum(
+            equity.status == 'On' for equity in self.equities.values()
+        )
 
         # Input form frame
         self.form_frame = tk.Frame(root)
@@ -226,12 +573,12 @@ class TradingBotGUI:
         self.chat_output = tk.Text(root, height=5, width=60, state=tk.DISABLED)
         self.chat_output.pack()
 
-        # Load saved data and start auto-update thread
+        # Load saved data and schedule the trading loop
         self.refresh_table()
 
         self.running = True
-        self.auto_update_thread = threading.Thread(target=self.auto_update, daemon=True)
-        self.auto_update_thread.start()
+        self.root.after(AUTO_UPDATE_INTERVAL * 1000, self._tick)
+        self.root.after(SAVE_INTERVAL * 1000, self._flush_equities)
 
     def add_equity(self):
         """
@@ -243,29 +590,33 @@ class TradingBotGUI:
         drawdown = self.drawdown_entry.get()
 
         # Validate inputs
-        if not symbol or not levels.isdigit() or not drawdown.replace('.', '', 1).isdigit():
+        if not symbol or not _INT_RE.fullmatch(levels) or not _FLOAT_RE.fullmatch(drawdown):
             messagebox.showerror("Error", "Invalid input.")
             return
         
         levels = int(levels)
+        if levels > MAX_LEVELS:
+            messagebox.showerror("Error", f"At most {MAX_LEVELS} levels are supported.")
+            return
         drawdown = float(drawdown) / 100
         entry_price = fetch_mock_api(symbol)['price']
 
-        # Calculate Martingale-style DCA levels
-        level_prices = {
-            i+1: round(entry_price * (1 - drawdown * (i+1)), 2) 
-            for i in range(levels)
-        }
-
-        self.equities[symbol] = {
-            "position": 0,
-            "entry_price": entry_price,
-            "levels": level_prices,
-            "drawdown": drawdown,
-            "status": "Off"
-        }
-        
-        self.save_equities()
+        # Re-adding a symbol replaces it with its system off
+        previous = self.equities.get(symbol)
+        if previous is not None and previous.status == 'On':
+            self._active_count -= 1
+        
+        self.equities[symbol] = Equity(
+            symbol=symbol,
+            position=0,
+            entry_price=entry_price,
+            drawdown=drawdown,
+            status="Off",
+            # Martingale-style DCA levels
+            levels=compute_level_prices(entry_price, drawdown, levels)
+        )
+        
+        self._mark_dirty()
         self.refresh_table()
         
         # Clear input fields
@@ -283,12 +634,13 @@ class TradingBotGUI:
             messagebox.showwarning("Warning", "No equity selected.")
             return
         
-        for item in selected_items:
-            symbol = self.tree.item(item)['values'][0]
-            current_status = self.equities[symbol]['status']
-            self.equities[symbol]['status'] = 'On' if current_status == 'Off' else 'Off'
+        for symbol in selected_items:
+            equity = self.equities[symbol]
+            equity.status = 'On' if equity.status == 'Off' else 'Off'
+            self._active_count += 1 if equity.status == 'On' else -1
+            self._pending_entries.pop(symbol, None)
 
-        self.save_equities()
+        self._mark_dirty()
         self.refresh_table()
 
     def remove_selected_equity(self):
@@ -300,11 +652,12 @@ class TradingBotGUI:
             messagebox.showwarning("Warning", "No equity selected.")
             return
         
-        for item in selected_items:
-            symbol = self.tree.item(item)['values'][0]
-            del self.equities[symbol]
+        for symbol in selected_items:
+            if self.equities.pop(symbol).status == 'On':
+                self._active_count -= 1
+            self._pending_entries.pop(symbol, None)
 
-        self.save_equities()
+        self._mark_dirty()
         self.refresh_table()
 
     def send_message(self):
@@ -335,191 +688,533 @@ class TradingBotGUI:
             dict: Dictionary with current price, or -1 if error
         """
         try:
-            barset = api.get_latest_trade(symbol)
+            barset = call_api(api.get_latest_trade, symbol)
             return {"price": barset.price}
         except Exception as e:
             return {"price": -1}
 
-    def check_existing_orders(self, symbol, price):
+    def check_existing_orders(self, symbol, price, open_index):
         """
         Check if an order already exists at a specific price for a symbol.
         
         Args:
             symbol (str): Stock ticker symbol
             price (float): Limit price to check
+            open_index (set): Open orders as built by index_open_orders
             
         Returns:
             bool: True if order exists, False otherwise
         """
-        try:
-            orders = api.list_orders(status='open', symbols=symbol)
-            for order in orders:
-                if float(order.limit_price) == price:
-                    return True
-        except Exception as e:
-            messagebox.showerror("API Error", f"Error checking orders: {e}")
-        return False
+        return (symbol, round(price, 2)) in open_index
+
+    def index_open_orders(self, orders):
+        """
+        Index open orders by symbol and limit price. Open market buys have
+        no limit price and are indexed as (symbol, None), which marks an
+        initial entry that is still working.
+        
+        Args:
+            orders (list): Open orders as returned by api.list_orders
+            
+        Returns:
+            set: (symbol, limit price rounded to cents) pairs
+        """
+        index = set()
+        for order in orders:
+            if order.limit_price:
+                index.add((order.symbol, round(float(order.limit_price), 2)))
+            elif order.side == 'buy':
+                index.add((order.symbol, None))
+        return index
 
-    def get_max_entry_price(self, symbol):
+    def get_max_entry_price(self, symbol, max_prices=None):
         """
         Get the highest filled order price for a symbol (most recent entry).
+        Without a preloaded index the symbol filter is applied server-side
+        and the result is cached for MAX_ENTRY_CACHE_TTL seconds. API errors
+        are raised to the caller, since this runs on the fetch pool.
         
         Args:
             symbol (str): Stock ticker symbol
+            max_prices (dict, optional): Preloaded symbol -> max filled price
+                index from index_max_fill_prices; skips the API call if given
             
         Returns:
             float: Maximum filled price, or -1 if no filled orders found
         """
+        if max_prices is not None:
+            return max_prices.get(symbol, -1)
+        
+        now = time.time()
+        cached = self._max_entry_cache.get(symbol)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        
+        orders = call_api(api.list_orders, status="filled", symbols=[symbol], limit=50)
+        prices = [
+            float(order.filled_avg_price) 
+            for order in orders 
+            if order.filled_avg_price
+        ]
+        price = max(prices) if prices else -1
+        self._max_entry_cache[symbol] = (price, now + MAX_ENTRY_CACHE_TTL)
+        return price
+
+    def index_max_fill_prices(self, orders):
+        """
+        Index filled orders by symbol, keeping the highest fill price.
+        
+        Args:
+            orders (list): Filled orders as returned by api.list_orders
+            
+        Returns:
+            dict: Mapping of symbol to maximum filled price
+        """
+        max_prices = {}
+        for order in orders:
+            if order.filled_avg_price:
+                price = float(order.filled_avg_price)
+                if price > max_prices.get(order.symbol, -1):
+                    max_prices[order.symbol] = price
+        return max_prices
+
+    def trade_systems(self, state):
+        """
+        Main trading logic. Plans orders for active systems from the
+        fetched account state and dispatches them according to the
+        Martingale DCA strategy.
+        
+        Args:
+            state (tuple): (positions, max_prices, open_index, fetched_at)
+                from _collect_api_state
+        """
+        orders, changed = self._plan(state)
+        if self._apply(orders) or changed:
+            self._mark_dirty()
+            self.refresh_table()
+
+    def _plan(self, state):
+        """
+        Work out which orders a trading pass should place. Updates entry
+        prices and levels from the account state but makes no API calls.
+        
+        Args:
+            state (tuple): (positions, max_prices, open_index, fetched_at)
+                from _collect_api_state
+            
+        Returns:
+            tuple: (orders, changed) where orders is a list of
+                (symbol, price, level) tuples, level 0 with no price being an
+                initial market entry, and changed tells whether any equity
+                data was modified
+        """
+        positions, max_prices, open_index, fetched_at = state
+        orders = []
+        changed = False
+        
+        for symbol, equity in self.equities.items():
+            if equity.status != 'On':
+                continue
+            
+            if symbol not in positions:
+                # No position exists, place initial market order unless one
+                # is already in flight or working at the broker. Levels are
+                # placed on a later pass once the fill shows up.
+                if symbol in self._pending_entries:
+                    accepted_at = self._pending_entries[symbol]
+                    if accepted_at is None or accepted_at >= fetched_at:
+                        continue
+                    # This fetch started after the order was accepted, so
+                    # open_index reflects it; an order that was cancelled,
+                    # rejected or expired can be retried
+                    del self._pending_entries[symbol]
+                if (symbol, None) not in open_index:
+                    orders.append((symbol, None, 0))
+                continue
+            self._pending_entries.pop(symbol, None)
+            
+            entry_price = self.get_max_entry_price(symbol, max_prices)
+            
+            # Recalculate prices of levels not yet placed based on
+            # actual entry; placed levels keep the price they went out at
+            levels = equity.levels
+            level_prices = compute_level_prices(
+                entry_price, equity.drawdown, len(levels)
+            ).tolist()
+            for level, price in enumerate(level_prices, start=1):
+                if equity.placed_bits & (1 << level):
+                    continue
+                if levels[level - 1] != price:
+                    levels[level - 1] = price
+                    changed = True
+                if self.check_existing_orders(symbol, price, open_index):
+                    # Already working at the broker, e.g. placed before the
+                    # data file was lost; record it instead of resubmitting
+                    equity.placed_bits |= 1 << level
+                    changed = True
+                else:
+                    orders.append((symbol, price, level))
+            
+            # Update equity data
+            if equity.entry_price != entry_price or equity.position != 1:
+                equity.entry_price = entry_price
+                equity.position = 1
+                changed = True
+        return orders, changed
+
+    def _apply(self, orders):
+        """
+        Dispatch planned orders. Requests are sent from the worker pool so
+        their latencies overlap and the event loop never blocks on them.
+        
+        Args:
+            orders (list): (symbol, price, level) tuples from _plan
+            
+        Returns:
+            bool: True if any level was marked as placed
+        """
+        placed = False
+        for symbol, price, level in orders:
+            if level == 0:
+                self.place_entry_order(symbol)
+            elif self.place_order(symbol, price, level):
+                placed = True
+        return placed
+
+    def place_entry_order(self, symbol):
+        """
+        Place the initial market order for a symbol.
+        
+        Args:
+            symbol (str): Stock ticker symbol
+        """
+        self._pending_entries[symbol] = None
+        future = self._executor.submit(
+            self._submit_order,
+            symbol=symbol,
+            qty=1,
+            side='buy',
+            type='market',
+            time_in_force='gtc'
+        )
+        future.add_done_callback(
+            lambda f: self._post_to_ui(self._entry_order_done, f, symbol)
+        )
+
+    def _submit_order(self, **order):
+        """
+        Submit an order once the rate limiter allows it (runs on the worker pool).
+        
+        Args:
+            **order: Keyword arguments for api.submit_order
+            
+        Returns:
+            The order returned by Alpaca
+        """
+        return call_api(api.submit_order, **order)
+
+    def _entry_order_done(self, future, symbol):
+        """
+        Report the outcome of an initial market order. A failed order can be
+        retried on the next pass; an accepted one is left to the open-orders
+        check once a later fetch has seen it (runs on the Tk thread).
+        
+        Args:
+            future (Future): Completed order submission
+            symbol (str): Stock ticker symbol
+        """
         try:
-            orders = api.list_orders(status="filled", limit=50)
-            prices = [
-                float(order.filled_avg_price) 
-                for order in orders 
-                if order.filled_avg_price and order.symbol == symbol
-            ]
-            return max(prices) if prices else -1
+            future.result()
         except Exception as e:
-            messagebox.showerror("API Error", f"Error fetching orders: {e}")
-            return 0
-
-    def trade_systems(self):
-        """
-        Main trading logic loop. Monitors active systems and places orders
-        according to Martingale DCA strategy.
-        """
-        for symbol, data in self.equities.items():
-            if data['status'] == 'On':
-                position_exists = False
-                
-                try:
-                    # Check if position exists
-                    position = api.get_position(symbol)
-                    entry_price = self.get_max_entry_price(symbol)
-                    position_exists = True
-                except Exception as e:
-                    # No position exists, place initial market order
-                    api.submit_order(
-                        symbol=symbol,
-                        qty=1,
-                        side='buy',
-                        type='market',
-                        time_in_force='gtc'
-                    )
-                    messagebox.showinfo("Order placed", f"Initial order placed for {symbol}")
-                    time.sleep(2)
-                    entry_price = self.get_max_entry_price(symbol)
-                
-                print(entry_price)
-                
-                # Recalculate level prices based on actual entry
-                level_prices = {
-                    i+1: round(entry_price * (1 - data['drawdown'] * (i+1)), 2) 
-                    for i in range(len(data['levels']))
-                }
-                
-                # Update levels
-                existing_levels = self.equities.get(symbol, {}).get('levels', {})
-                for level, price in level_prices.items():
-                    if level not in existing_levels and -level not in existing_levels:
-                        existing_levels[level] = price
-                
-                # Update equity data
-                self.equities[symbol]['entry_price'] = entry_price
-                self.equities[symbol]['levels'] = existing_levels
-                self.equities[symbol]['position'] = 1
-
-                # Place limit orders for each level
-                for level, price in level_prices.items():
-                    if level in self.equities[symbol]['levels']:
-                        self.place_order(symbol, price, level)
-                
-                self.save_equities()
-                self.refresh_table()
-            else:
-                return
+            self._pending_entries.pop(symbol, None)
+            messagebox.showerror("Order Error", f"Error placing order: {e}")
+        else:
+            if symbol in self._pending_entries:
+                self._pending_entries[symbol] = time.monotonic()
+            messagebox.showinfo("Order placed", f"Initial order placed for {symbol}")
     
     def place_order(self, symbol, price, level):
         """
-        Place a limit order for a specific level.
+        Place a limit order for a specific level. The level is marked as
+        placed straight away so later passes don't resubmit it while the
+        request is in flight; the mark is rolled back if the order fails.
         
         Args:
             symbol (str): Stock ticker symbol
             price (float): Limit price for the order
             level (int): DCA level number
+            
+        Returns:
+            bool: True if the order was sent, False if the level was
+                already placed
         """
+        equity = self.equities[symbol]
+        bit = 1 << level
+        
         # Check if order already placed for this level
-        if -level in self.equities[symbol]['levels'] or '-1' in self.equities[symbol]['levels'].keys():
-            return
+        if equity.placed_bits & bit:
+            return False
+        
+        equity.placed_bits |= bit
+        
+        future = self._executor.submit(
+            self._submit_order,
+            symbol=symbol,
+            qty=1,
+            side='buy',
+            type='limit',
+            time_in_force='gtc',
+            limit_price=price
+        )
+        self._inflight_orders[future] = (symbol, level)
+        future.add_done_callback(
+            lambda f: self._post_to_ui(self._limit_order_done, f, symbol, price, level)
+        )
+        return True
+
+    def _limit_order_done(self, future, symbol, price, level):
+        """
+        Report the outcome of a limit order and roll back the placed mark
+        on failure (runs on the Tk thread).
         
+        Args:
+            future (Future): Completed order submission
+            symbol (str): Stock ticker symbol
+            price (float): Limit price of the order
+            level (int): DCA level number
+        """
+        self._inflight_orders.pop(future, None)
         try:
-            api.submit_order(
-                symbol=symbol,
-                qty=1,
-                side='buy',
-                type='limit',
-                time_in_force='gtc',
-                limit_price=price
-            )
-            # Mark level as order placed (negative indicates placed)
-            self.equities[symbol]['levels'][-level] = price
-            del self.equities[symbol]['levels'][level]
-            print(f"Placed Order for {symbol}@{price}")
+            future.result()
         except Exception as e:
+            equity = self.equities.get(symbol)
+            if equity is not None:
+                equity.placed_bits &= ~(1 << level)
+                self._mark_dirty()
+                self.refresh_table()
             messagebox.showerror("Order Error", f"Error placing order: {e}")
+        else:
+            print(f"Placed Order for {symbol}@{price}")
 
     def refresh_table(self):
         """
         Refresh the treeview table with current equity data.
+        Only rows whose values changed are updated; nothing is done if the
+        equity data hasn't changed since the last refresh.
         """
-        # Clear existing rows
-        for row in self.tree.get_children():
-            self.tree.delete(row)
+        version = self._equities_version
+        if version == self._refreshed_version:
+            return
+        
+        # Drop rows for removed equities
+        for symbol in list(self._row_values):
+            if symbol not in self.equities:
+                self.tree.delete(symbol)
+                del self._row_values[symbol]
 
-        # Insert updated data
-        for symbol, data in self.equities.items():
-            self.tree.insert('', 'end', values=(
+        # Insert new rows and update changed ones
+        for symbol, equity in self.equities.items():
+            values = (
                 symbol,
-                data['position'],
-                data['entry_price'],
-                str(data['levels']),
-                data['status']
-            ))
+                equity.position,
+                equity.entry_price,
+                format_levels(equity.levels, equity.placed_bits),
+                equity.status
+            )
+            previous = self._row_values.get(symbol)
+            if previous is None:
+                self.tree.insert('', 'end', iid=symbol, values=values)
+            elif previous != values:
+                self.tree.item(symbol, values=values)
+            self._row_values[symbol] = values
+        
+        self._refreshed_version = version
+
+    def _tick(self):
+        """
+        Tk callback that starts a trading pass. Account data is fetched on
+        the worker pool and handed back to the event loop, so all Tk and
+        equity state is only ever touched from the Tk thread.
+        """
+        if not self.running:
+            return
+        if self._active_count == 0:
+            # No systems on, so skip the API calls entirely
+            self.root.after(AUTO_UPDATE_INTERVAL * 1000, self._tick)
+            return
+        active = [
+            symbol for symbol, equity in self.equities.items()
+            if equity.status == 'On'
+        ]
+        future = self._state_executor.submit(self._collect_api_state, active)
+        future.add_done_callback(
+            lambda f: self._post_to_ui(self._apply_state, f)
+        )
+
+    def _collect_api_state(self, active):
+        """
+        Fetch the account data a trading pass needs (runs on the state worker).
+        Positions, filled orders and open orders are fetched once and
+        shared by every symbol instead of being requested per symbol.
+        
+        Args:
+            active (list): Symbols whose trading system is on
+        
+        Returns:
+            tuple: (positions by symbol, max filled price by symbol,
+                set of open (symbol, limit price) pairs, monotonic time the
+                fetch started)
+        """
+        fetched_at = time.monotonic()
+        # The requests are independent, so issue them concurrently and
+        # wait for the slowest rather than paying each round trip in turn
+        positions_future = self._fetch_executor.submit(call_api, api.list_positions)
+        filled_future = self._fetch_executor.submit(
+            call_api, api.list_orders, status='filled', limit=500
+        )
+        open_future = self._fetch_executor.submit(
+            call_api, api.list_orders, status='open', limit=500
+        )
+        positions = {p.symbol: p for p in positions_future.result()}
+        max_prices = self.index_max_fill_prices(filled_future.result())
+        open_index = self.index_open_orders(open_future.result())
+        
+        # Held symbols whose fills are older than the shared batch
+        missing = [
+            symbol for symbol in active
+            if symbol in positions and symbol not in max_prices
+        ]
+        max_prices.update(zip(
+            missing, self._fetch_executor.map(self.get_max_entry_price, missing)
+        ))
+        return positions, max_prices, open_index, fetched_at
+
+    def _apply_state(self, future):
+        """
+        Run a trading pass with freshly fetched account data and schedule
+        the next one (runs on the Tk thread). The next pass is scheduled
+        even if this one raises, so an error never stops the trading loop.
+        
+        Args:
+            future (Future): Completed _collect_api_state call
+        """
+        try:
+            try:
+                state = future.result()
+            except Exception as e:
+                messagebox.showerror("API Error", f"Error fetching account data: {e}")
+            else:
+                self.trade_systems(state)
+        finally:
+            if self.running:
+                self.root.after(AUTO_UPDATE_INTERVAL * 1000, self._tick)
 
-    def auto_update(self):
+    def _post_to_ui(self, callback, *args):
         """
-        Background thread that continuously monitors and executes trades.
-        Runs every 5 seconds while the application is running.
+        Schedule a callback on the Tk event loop. Used by worker pool
+        completion callbacks, which must not touch Tk directly.
+        
+        Args:
+            callback: Function to run on the Tk thread
+            *args: Arguments passed to the callback
         """
-        while self.running:
-            time.sleep(5)
-            self.trade_systems()
+        if self.running:
+            self.root.after(0, callback, *args)
     
-    def save_equities(self):
+    def _mark_dirty(self):
+        """
+        Flag equity data as modified. The write itself is deferred to
+        _flush_equities so bursts of mutations result in a single save.
+        """
+        self._equities_version += 1
+
+    def _flush_equities(self):
+        """
+        Periodic Tk callback that persists equity data if it has changed
+        and at least SAVE_INTERVAL seconds have passed since the last write.
+        A failed write is reported once and retried on the next call.
+        """
+        if not self.running:
+            return
+        self.root.after(SAVE_INTERVAL * 1000, self._flush_equities)
+        if time.time() - self._last_save < SAVE_INTERVAL:
+            return
+        
+        try:
+            self.save_equities()
+        except (OSError, TypeError, ValueError) as e:
+            if not self._save_failed:
+                messagebox.showerror("Save Error", f"Error saving equity data: {e}")
+            self._save_failed = True
+        else:
+            self._save_failed = False
+
+    def save_equities(self, pretty=False):
         """
         Save equity data to JSON file for persistence.
+        Writes to a temporary file first and swaps it in atomically so a
+        crash mid-write never leaves a truncated data file behind.
+        Nothing is encoded if the data hasn't changed since the last save,
+        and nothing is written if it encodes to the same bytes as before.
+        
+        Args:
+            pretty (bool): Write indented JSON for human inspection, even if
+                the data hasn't changed. Routine saves are compact.
         """
-        with open(DATA_FILE, 'w') as f:
-            json.dump(self.equities, f, indent=2)
+        version = self._equities_version
+        if version == self._saved_version and not pretty:
+            return
+        
+        blob = dump_json(self.equities, pretty)
+        if blob != self._cached_blob:
+            tmp_file = DATA_FILE + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp_file, DATA_FILE)
+            self._cached_blob = blob
+        self._saved_version = version
+        self._last_save = time.time()
     
     def load_equities(self):
         """
         Load equity data from JSON file.
         
         Returns:
-            dict: Dictionary of equity data, or empty dict if file doesn't exist
+            dict: Equity objects by symbol, or empty dict if file doesn't exist
         """
         try:    
-            with open(DATA_FILE, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
+            with open(DATA_FILE, 'rb') as f:
+                equities = load_json(f.read())
+        except (FileNotFoundError, ValueError):
             return {}
+        
+        for symbol, data in equities.items():
+            migrate_levels(data)
+            data['symbol'] = symbol
+            equities[symbol] = Equity(**data)
+        return equities
     
     def on_close(self):
         """
-        Handle application closure. Stops background threads and saves data.
+        Handle application closure. Stops the trading loop and saves data.
+        Queued order requests are cancelled and running ones are waited
+        for, so levels whose order never went out aren't saved as placed.
         """
         self.running = False
-        self.save_equities()
+        self._state_executor.shutdown(wait=False, cancel_futures=True)
+        self._fetch_executor.shutdown(wait=False, cancel_futures=True)
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        for future, (symbol, level) in self._inflight_orders.items():
+            if future.cancelled() or future.exception() is not None:
+                equity = self.equities.get(symbol)
+                if equity is not None:
+                    equity.placed_bits &= ~(1 << level)
+                    self._mark_dirty()
+        
+        try:
+            self.save_equities(pretty=True)
+        except (OSError, TypeError, ValueError) as e:
+            messagebox.showerror("Save Error", f"Error saving equity data: {e}")
         self.root.destroy()
 
 